@@ -14,8 +14,12 @@
                其他   视作匹配字符或模式，将首次匹配到的部分替换为该字符串。
 """
 import argparse
+import csv
+import mmap
 import os
+import shutil
 import sys
+import tempfile
 from datetime import datetime
 
 def parse_args():
@@ -36,12 +40,62 @@ def parse_args():
     )
     return parser.parse_args()
 
+def advise_sequential(fileobj):
+    """
+    提示操作系统该文件将被顺序读取 (尽力而为，不支持时忽略)。
+    """
+    try:
+        os.posix_fadvise(fileobj.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return
+    except (AttributeError, OSError):
+        pass
+    # macOS 没有 posix_fadvise，改为开启预读
+    try:
+        import fcntl
+        fcntl.fcntl(fileobj.fileno(), fcntl.F_RDAHEAD, 1)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+
+def advise_mapped(mm):
+    """
+    mmap 读取时对映射区域给出顺序访问提示 (尽力而为，不支持时忽略)。
+    """
+    try:
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    except (AttributeError, OSError):
+        pass
+
+
+def _read_mapping_pandas(path):
+    """
+    用 pandas 批量解析映射文件；未安装 pandas 或存在列数不为 2 的行时返回 None，交由逐行解析处理并给出警告。
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    try:
+        df = pd.read_csv(path, sep=r'\s+', header=None, dtype=str, keep_default_na=False,
+                         quoting=csv.QUOTE_NONE, encoding='utf-8')
+    except ValueError:
+        return None
+    if df.shape[1] != 2 or df.isna().any().any() or (df == '').any().any():
+        return None
+    return list(zip(df[0], df[1]))
+
+
 def read_mapping(path):
     """
     读取映射文件，返回 (filename, suffix) 列表。
+    已安装 pandas 时优先批量解析。
     """
+    mapping = _read_mapping_pandas(path)
+    if mapping is not None:
+        return mapping
     mapping = []
     with open(path, 'r', encoding='utf-8') as f:
+        advise_sequential(f)
         for lineno, line in enumerate(f, start=1):
             parts = line.strip().split()
             if len(parts) != 2:
@@ -59,29 +113,72 @@ def process_fasta(fasta_file, suffix, position):
       - 其他：将 header 中首次匹配到 position 的部分替换为 suffix
     返回修改的序列数。
     """
+    # 以字节处理，suffix/position 预先编码
+    suffix_b = suffix.encode('utf-8')
+    position_b = position.encode('utf-8')
+
+    # 按 position 预先确定 header 改写方式，避免逐行判断
+    if position == 'before':
+        def rename(header):
+            return suffix_b + header
+    elif position == 'after':
+        def rename(header):
+            return header + suffix_b
+    else:
+        plen = len(position_b)
+
+        def rename(header):
+            idx = header.find(position_b)
+            if idx >= 0:
+                return header[:idx] + suffix_b + header[idx + plen:]
+            # 未找到匹配，保留原 header 并直接加后缀
+            return header + suffix_b
+
+    if os.path.getsize(fasta_file) == 0:
+        return 0
+
     count = 0
-    lines = []
-    with open(fasta_file, 'r', encoding='utf-8') as fr:
-        for line in fr:
-            if line.startswith('>'):
-                header = line[1:].rstrip('\n')
-                if position == 'before':
-                    new_header = suffix + header
-                elif position == 'after':
-                    new_header = header + suffix
-                else:
-                    if position in header:
-                        new_header = header.replace(position, suffix, 1)
-                    else:
-                        # 未找到匹配，保留原 header 并直接加后缀
-                        new_header = header + suffix
-                lines.append('>' + new_header + '\n')
-                count += 1
+    # 解析符号链接，写穿到真实文件；临时文件建在同一目录下，保证 os.replace 为原子替换
+    target = os.path.realpath(fasta_file)
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(target) + '.', suffix='.tmp',
+                               dir=os.path.dirname(target))
+    replaced = False
+    try:
+        # 通过 mmap 在 "\n>" 之间跳转：header 行逐条改写，两个 header 之间的序列数据整块写出
+        with os.fdopen(fd, 'wb', buffering=1 << 20) as fw, \
+                open(target, 'rb') as fr, \
+                mmap.mmap(fr.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            advise_mapped(mm)
+            if mm[:1] == b'>':
+                i = 0
             else:
-                lines.append(line)
-    # 写回文件
-    with open(fasta_file, 'w', encoding='utf-8') as fw:
-        fw.writelines(lines)
+                i = mm.find(b'\n>')
+                i = i + 1 if i >= 0 else -1
+            prev = 0
+            while i >= 0:
+                fw.write(mm[prev:i])
+                j = mm.find(b'\n', i)
+                if j < 0:
+                    j = len(mm)
+                header = mm[i + 1:j]
+                eol = b'\n'
+                if header[-1:] == b'\r':
+                    # 保留 CRLF 换行风格
+                    header = header[:-1]
+                    eol = b'\r\n'
+                fw.write(b'>' + rename(header) + eol)
+                count += 1
+                prev = j + 1
+                i = mm.find(b'\n>', j)
+                i = i + 1 if i >= 0 else -1
+            fw.write(mm[prev:])
+        # 保留原文件权限后替换
+        shutil.copymode(target, tmp)
+        os.replace(tmp, target)
+        replaced = True
+    finally:
+        if not replaced:
+            os.unlink(tmp)
     return count
 
 
@@ -36,8 +36,10 @@ python3 kraken_kmer_compare.py --out1 out1.kraken --out2 out2.kraken --df1 df1.t
 
 Notes on this modified version
 ------------------------------
-- Added --threads to parallelize processing of unannotated titles.
-- Use a SQLite index for out1 to avoid loading the whole file into memory.
+- Added --threads to parallelize processing of unannotated titles. Titles are
+  processed in chunks by worker processes (the work is CPU-bound Python).
+- out1 is streamed once and only the records of unannotated out2 titles are kept
+  in memory (replaces the former SQLite index).
 - Verbose logging (-v/--verbose) is ON by default; use --no-verbose to turn it off.
 """
 
@@ -45,15 +47,21 @@ import argparse
 import csv
 import re
 import sys
-from collections import Counter
+from collections import Counter, deque
 import logging
 import concurrent.futures
-import sqlite3
-import threading
 import os
 
-# Thread-local storage for per-thread sqlite connections
-_thread_local = threading.local()
+# id:count pairs inside a kmer-annotation field
+_KMER_RE = re.compile(r"(\d+):(\d+)")
+
+# Number of titles sent to a worker process per task
+CHUNK_SIZE = 1000
+
+# df1 lookups and multiplier for process_title(); set per process by init_worker()
+_worker_df1 = {}
+_worker_df1_taxids = set()
+_worker_multiplier = 3.0
 
 
 def parse_args():
@@ -70,9 +78,9 @@ def parse_args():
     # -v default ON per user request; add --no-verbose to allow disabling
     p.add_argument('-v', '--verbose', dest='verbose', action='store_true', default=True, help='Verbose logging (default ON)')
     p.add_argument('--no-verbose', dest='verbose', action='store_false', help='Disable verbose logging')
-    p.add_argument('--threads', type=int, default=1, help='Number of worker threads to use for processing unannotated titles (default: 1)')
-    # Optionally allow forcing index rebuild (handy)
-    p.add_argument('--rebuild-index', action='store_true', help='Force rebuild the out1 sqlite index even if index file exists')
+    p.add_argument('--threads', type=int, default=1, help='Number of worker processes to use for processing unannotated titles (default: 1)')
+    # deprecated: out1 is streamed and no sqlite index is built; kept so old command lines still parse
+    p.add_argument('--rebuild-index', action='store_true', help=argparse.SUPPRESS)
     return p.parse_args()
 
 
@@ -81,12 +89,58 @@ def setup_logging(verbose: bool):
     logging.basicConfig(level=level, format='[%(levelname)s] %(message)s')
 
 
+def advise_sequential(fileobj):
+    """Hint the OS that fileobj will be read sequentially (best effort, no-op if unsupported)."""
+    try:
+        os.posix_fadvise(fileobj.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return
+    except (AttributeError, OSError):
+        pass
+    # macOS has no posix_fadvise; turn on read-ahead instead
+    try:
+        import fcntl
+        fcntl.fcntl(fileobj.fileno(), fcntl.F_RDAHEAD, 1)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+
+def _load_df1_pandas(path):
+    """Bulk-parse a strict two-column tab df1 with pandas.
+
+    Return the taxid -> species dict, or None when pandas is not installed or the
+    file does not have exactly two tab-separated fields on every line (the line-by-line
+    parser handles those).
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    try:
+        df = pd.read_csv(path, sep='\t', header=None, dtype=str, keep_default_na=False,
+                         quoting=csv.QUOTE_NONE, encoding='utf-8')
+    except ValueError:
+        return None
+    if df.shape[1] != 2 or df.isna().any().any():
+        return None
+    taxids = df[0].str.strip()
+    species = df[1].str.strip().str.replace(r'\s+', '_', regex=True)
+    if (taxids == '').any() or (species == '').any():
+        return None
+    return dict(zip(taxids, species))
+
+
 def load_df1(path):
     """Load df1 mapping file: taxid -> species string.
     Return dict taxid(str) -> species(str-without-spaces-replaced-by-hyphen)
+    Uses pandas for the common strict two-column layout when it is installed.
     """
+    d = _load_df1_pandas(path)
+    if d is not None:
+        logging.info('Loaded %d df1 entries from %s', len(d), path)
+        return d
     d = {}
     with open(path, 'r', encoding='utf-8') as fh:
+        advise_sequential(fh)
         for line in fh:
             line = line.strip()
             if not line:
@@ -119,94 +173,113 @@ def parse_kmer_field(field_text: str):
     if not field_text:
         return Counter()
     # try to find all id:count pairs
-    pairs = re.findall(r"(\d+):(\d+)", field_text)
+    pairs = _KMER_RE.findall(field_text)
     if pairs:
         cnt = Counter()
         for tid, c in pairs:
             cnt[tid] += int(c)
         return cnt
-    # fallback: split on whitespace or semicolon and look for token like tid:count
-    tokens = re.split(r'[\s;|,]+', field_text)
-    cnt = Counter()
-    for tok in tokens:
-        if ':' in tok:
-            a, b = tok.split(':', 1)
-            if a.isdigit() and b.isdigit():
-                cnt[a] += int(b)
-    return cnt
+    else:
+        # fallback: split on whitespace or semicolon and look for token like tid:count
+        tokens = re.split(r'[\s;|,]+', field_text)
+        cnt = Counter()
+        for tok in tokens:
+            if ':' in tok:
+                a, b = tok.split(':', 1)
+                if a.isdigit() and b.isdigit():
+                    cnt[a] += int(b)
+        return cnt
 
 
-def parse_kraken_out(path, title_col=2, taxid_col=3, kmer_col=5):
-    """Parse kraken per-read output into dicts keyed by title.
+def scan_out2(path, df1_taxids, title_col=2, taxid_col=3, kmer_col=5):
+    """Stream kraken out2 once, counting df1 hits and collecting unannotated titles.
 
     Returns:
-      records: dict title -> dict(status, taxid, kmer_field, kmer_counter, raw_line)
-    Note: this function is still used to parse out2 into memory (out2 is used to find
-    unannotated titles and quick checks). For out1 we will instead build/use a sqlite index.
+      stats: dict(total_checked, exist_in_df1, not_exist_in_df1)
+      unannotated_titles: list of titles unannotated in out2 (file order)
+      out2_fields: dict title -> raw kmer_field, only for unannotated titles
+    Annotated records are counted on the fly and not stored.
+    Records are judged line by line: a title repeated in out2 is reviewed once (at its
+    first position, using its last unannotated record), while each annotated line
+    counts in the df1 stats. A title that is annotated on one line and unannotated on
+    another therefore appears in both.
     """
-    records = {}
+    total_checked = 0
+    exist_in_df1 = 0
+    unannotated_titles = []
+    out2_fields = {}
+    # bind hot-loop lookups to locals
+    df1_contains = df1_taxids.__contains__
+    add_title = unannotated_titles.append
+    title_i, taxid_i, kmer_i = title_col - 1, taxid_col - 1, kmer_col - 1
     with open(path, 'r', encoding='utf-8') as fh:
-        for ln, line in enumerate(fh, start=1):
+        advise_sequential(fh)
+        for line in fh:
             line = line.rstrip('\n')
             if not line:
                 continue
             parts = line.split('\t')
-            # safe access with 1-based indices provided
-            status = parts[0] if len(parts) >= 1 else ''
-            title = parts[title_col - 1] if len(parts) >= title_col else ''
-            taxid = parts[taxid_col - 1] if len(parts) >= taxid_col else '0'
-            kmer_field = parts[kmer_col - 1] if len(parts) >= kmer_col else ''
-            kmer_counter = parse_kmer_field(kmer_field)
-            records[title] = {
-                'status': status,
-                'taxid': taxid,
-                'kmer_field': kmer_field,
-                'kmer_counter': kmer_counter,
-                'raw_line': line,
-                'line_no': ln
-            }
-    logging.info('Parsed %d records from %s', len(records), path)
-    return records
-
-
-def composite_counts(c1: Counter, c2: Counter):
-    """Return composite Counter adding counts from two Counters."""
-    c = Counter()
-    c.update(c1)
-    c.update(c2)
-    return c
-
-
-def sorted_composite_str(counter_obj: Counter):
-    """Return string like taxid:count>taxid:count sorted desc by count."""
-    if not counter_obj:
-        return ''
-    items = sorted(counter_obj.items(), key=lambda x: (-x[1], x[0]))
-    return '>'.join(f"{tid}:{cnt}" for tid, cnt in items)
+            n = len(parts)
+            # Kraken status is a single char; taxid falls back to '0' when missing/empty
+            s = parts[0]
+            t = (parts[taxid_i] if n > taxid_i else '') or '0'
+            # treat 'C' as classified; also treat taxid != '0' as annotated
+            if s == 'C' or (t != '0' and t != 'NA'):
+                # this sequence participates in df1 check
+                total_checked += 1
+                if df1_contains(t):
+                    exist_in_df1 += 1
+            else:
+                # unannotated in out2, add to review set
+                title = parts[title_i] if n > title_i else ''
+                # repeated unannotated title: review it once at its first position,
+                # but keep the last record's field (as load_out1_subset does for out1)
+                if title not in out2_fields:
+                    add_title(title)
+                out2_fields[title] = parts[kmer_i] if n > kmer_i else ''
+    stats = {
+        'total_checked': total_checked,
+        'exist_in_df1': exist_in_df1,
+        'not_exist_in_df1': total_checked - exist_in_df1,
+    }
+    logging.info('Scanned %s: kept %d unannotated records', path, len(unannotated_titles))
+    return stats, unannotated_titles, out2_fields
+
+
+def composite_and_sort(c1: Counter, c2: Counter):
+    """Sum two Counters and sort once.
+
+    Returns (items, comp_str): items is a list of (taxid, count) sorted desc by count
+    (ties by taxid) and comp_str is the matching "taxid:count>taxid:count" string.
+    """
+    comp = dict(c1)
+    for tid, cnt in c2.items():
+        comp[tid] = comp.get(tid, 0) + cnt
+    items = sorted(comp.items(), key=lambda x: (-x[1], x[0]))
+    comp_str = '>'.join(f"{tid}:{cnt}" for tid, cnt in items)
+    return items, comp_str
 
 
 def determine_ref_taxid_from_out1(kmer_counter: Counter, df1_taxids_set):
     """From out1 kmer counter pick the taxid that exists in df1 (highest count among those).
     Return taxid or 'NA'."""
-    if not kmer_counter:
-        return 'NA'
-    # filter keys that are in df1
-    candidates = [(tid, cnt) for tid, cnt in kmer_counter.items() if tid in df1_taxids_set]
-    if not candidates:
-        return 'NA'
-    # pick highest count
-    candidates.sort(key=lambda x: -x[1])
-    return candidates[0][0]
-
-
-def final_judgement(composite_counter: Counter, ref_taxid: str, multiplier: float):
+    # single pass keeping the first highest-count taxid present in df1
+    best = None
+    best_cnt = -1
+    for tid, cnt in kmer_counter.items():
+        if cnt > best_cnt and tid in df1_taxids_set:
+            best, best_cnt = tid, cnt
+    return best if best is not None else 'NA'
+
+
+def final_judgement(items, ref_taxid: str, multiplier: float):
     """Apply the judgement rules described in the specification.
 
+    items are the composite (taxid, count) pairs already sorted by composite_and_sort().
     Returns 'T' or 'F'.
     """
-    if ref_taxid == 'NA' or not composite_counter:
+    if ref_taxid == 'NA' or not items:
         return 'F'
-    items = sorted(composite_counter.items(), key=lambda x: (-x[1], x[0]))
     top_tid, top_cnt = items[0]
     # if top equals ref_taxid -> T
     if top_tid == ref_taxid:
@@ -236,93 +309,58 @@ def final_judgement(composite_counter: Counter, ref_taxid: str, multiplier: floa
     return 'F'
 
 
-######## SQLite index helpers for out1 (streaming approach) ########
+def load_out1_subset(path, needed_titles, title_col=2, kmer_col=5):
+    """Stream out1 once and keep the kmer field of titles in needed_titles.
 
-def build_out1_sqlite_index(out1_path, db_path, title_col=2, taxid_col=3, kmer_col=5):
-    """
-    Build a sqlite index file for out1 so we don't need to hold all out1 records in memory.
-    Table schema: out1(title PRIMARY KEY, status, taxid, kmer_field, raw_line, line_no)
-    If db_path already exists, this function does nothing (to reuse existing index).
+    Returns:
+      dict title -> kmer_field
+    A single sequential scan filtered against a set is much cheaper than building
+    and querying an index when the set of wanted titles is known up front. Only the
+    kmer field is kept since it is the only out1 column the worker reads.
     """
-    if os.path.exists(db_path):
-        logging.info('SQLite index already exists at %s, skipping build.', db_path)
-        return
-
-    logging.info('Building sqlite index for out1 (%s) -> %s', out1_path, db_path)
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute("PRAGMA synchronous = OFF;")
-    cur.execute("PRAGMA journal_mode = MEMORY;")
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS out1 (
-            title TEXT PRIMARY KEY,
-            status TEXT,
-            taxid TEXT,
-            kmer_field TEXT,
-            raw_line TEXT,
-            line_no INTEGER
-        );
-    """)
-    conn.commit()
-
-    insert_sql = "INSERT OR REPLACE INTO out1 (title, status, taxid, kmer_field, raw_line, line_no) VALUES (?, ?, ?, ?, ?, ?)"
-    batch = []
-    batch_size = 2000
-    with open(out1_path, 'r', encoding='utf-8') as fh:
-        for ln, line in enumerate(fh, start=1):
+    out1_fields = {}
+    title_i, kmer_i = title_col - 1, kmer_col - 1
+    with open(path, 'r', encoding='utf-8') as fh:
+        advise_sequential(fh)
+        for line in fh:
             line = line.rstrip('\n')
             if not line:
                 continue
             parts = line.split('\t')
-            status = parts[0] if len(parts) >= 1 else ''
-            title = parts[title_col - 1] if len(parts) >= title_col else ''
-            taxid = parts[taxid_col - 1] if len(parts) >= taxid_col else '0'
-            kmer_field = parts[kmer_col - 1] if len(parts) >= kmer_col else ''
-            batch.append((title, status, taxid, kmer_field, line, ln))
-            if len(batch) >= batch_size:
-                cur.executemany(insert_sql, batch)
-                conn.commit()
-                batch = []
-    if batch:
-        cur.executemany(insert_sql, batch)
-        conn.commit()
-    conn.close()
-    logging.info('Finished building sqlite index.')
-
-
-def get_thread_db_conn(db_path):
-    """
-    Return a per-thread sqlite3 connection (stored in thread-local).
-    Use check_same_thread=False to be safe; each thread gets its own connection.
-    """
-    conn = getattr(_thread_local, 'conn', None)
-    if conn is None:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        # return rows as tuples (we parse fields ourselves)
-        _thread_local.conn = conn
-    return conn
+            n = len(parts)
+            title = parts[title_i] if n > title_i else ''
+            if title in needed_titles:
+                out1_fields[title] = parts[kmer_i] if n > kmer_i else ''
+    logging.info('Loaded %d / %d needed records from %s', len(out1_fields), len(needed_titles), path)
+    return out1_fields
 
 
-def fetch_out1_record_from_db(db_path, title):
-    """
-    Fetch a single record for title from the sqlite index.
-    Returns a dict like parse_kraken_out produces, or None if not found.
-    """
-    conn = get_thread_db_conn(db_path)
-    cur = conn.cursor()
-    cur.execute("SELECT status, taxid, kmer_field, raw_line, line_no FROM out1 WHERE title = ?", (title,))
-    row = cur.fetchone()
-    if not row:
-        return None
-    status, taxid, kmer_field, raw_line, line_no = row
-    return {
-        'status': status,
-        'taxid': taxid,
-        'kmer_field': kmer_field,
-        'kmer_counter': parse_kmer_field(kmer_field),
-        'raw_line': raw_line,
-        'line_no': line_no
-    }
+######################## Worker ########################
+
+def init_worker(df1, multiplier):
+    """Install df1 and the judgement multiplier for process_title() in this process."""
+    global _worker_df1, _worker_df1_taxids, _worker_multiplier
+    _worker_df1 = df1
+    _worker_df1_taxids = set(df1.keys())
+    _worker_multiplier = multiplier
+
+
+def process_title(title, out1_field, out2_field):
+    """Evaluate one unannotated title and return its output row."""
+    out1_counter = parse_kmer_field(out1_field)
+    out2_counter = parse_kmer_field(out2_field)
+    # determine ref_taxid from out1 kmer results
+    ref_taxid = determine_ref_taxid_from_out1(out1_counter, _worker_df1_taxids)
+    ref_species = _worker_df1.get(ref_taxid, 'NA') if ref_taxid != 'NA' else 'NA'
+    # composite counts (sum of out1 and out2 for this title)
+    items, comp_str = composite_and_sort(out1_counter, out2_counter)
+    judgement = final_judgement(items, ref_taxid, _worker_multiplier)
+    return [title, out1_field, out2_field, ref_taxid, ref_species, comp_str, judgement]
+
+
+def worker_chunk(chunk):
+    """Process a list of (title, out1_field, out2_field) and return the rows in order."""
+    return [process_title(title, f1, f2) for title, f1, f2 in chunk]
 
 
 ########################## Main ##########################
@@ -331,113 +369,88 @@ def main():
     args = parse_args()
     setup_logging(args.verbose)
 
+    if args.rebuild_index:
+        logging.warning('--rebuild-index is deprecated and ignored: out1 is streamed, no sqlite index is built.')
+
     if args.threads is None or args.threads < 1:
         args.threads = 1
 
     df1 = load_df1(args.df1)
     df1_taxids = set(df1.keys())
 
-    # parse out2 first and count annotated sequences existence in df1
-    out2_records = parse_kraken_out(args.out2, title_col=args.title_col, taxid_col=args.taxid_col, kmer_col=args.kmer_col)
-
-    total_checked = 0
-    exist_in_df1 = 0
-    not_exist_in_df1 = 0
-    unannotated_titles = []
+    # stream out2 first and count annotated sequences existence in df1
+    stats, unannotated_titles, out2_fields = scan_out2(args.out2, df1_taxids, title_col=args.title_col, taxid_col=args.taxid_col, kmer_col=args.kmer_col)
 
-    for title, rec in out2_records.items():
-        status = rec['status']
-        taxid = rec['taxid'] if rec['taxid'] else '0'
-        # treat 'C' as classified; also treat taxid != '0' as annotated
-        if (status and status.startswith('C')) or (taxid != '0' and taxid != 'NA'):
-            # this sequence participates in df1 check
-            total_checked += 1
-            if taxid in df1_taxids:
-                exist_in_df1 += 1
-            else:
-                not_exist_in_df1 += 1
-        else:
-            # unannotated in out2, add to review set
-            unannotated_titles.append(title)
-
-    logging.info('Out2: total sequences participating in df1 check: %d', total_checked)
-    logging.info('Out2: sequences with taxid present in df1: %d', exist_in_df1)
-    logging.info('Out2: sequences with taxid NOT present in df1: %d', not_exist_in_df1)
+    logging.info('Out2: total sequences participating in df1 check: %d', stats['total_checked'])
+    logging.info('Out2: sequences with taxid present in df1: %d', stats['exist_in_df1'])
+    logging.info('Out2: sequences with taxid NOT present in df1: %d', stats['not_exist_in_df1'])
     logging.info('Out2: unannotated sequences to review: %d', len(unannotated_titles))
 
     outpath = f"{args.out_prefix}.tsv"
-    # write header early
+    # write header early; fields never contain tabs/quotes, so rows are joined directly
     with open(outpath, 'w', encoding='utf-8') as outfh:
-        writer = csv.writer(outfh, delimiter='\t', lineterminator='\n')
         header = ['title','out1_kmer_info','out2_kmer_info','ref_taxid','ref_species','composite_kmer_counts','final_judgement']
-        writer.writerow(header)
+        outfh.write('\t'.join(header) + '\n')
 
     if not unannotated_titles:
         logging.info('No unannotated sequences in out2. Exiting.')
         logging.info('Wrote empty output %s', outpath)
         return
 
-    # Prepare sqlite index for out1 (streaming)
-    db_path = f"{args.out_prefix}.out1.sqlite"
-    if args.rebuild_index and os.path.exists(db_path):
-        try:
-            os.remove(db_path)
-            logging.info('Removed existing index due to --rebuild-index flag.')
-        except Exception as e:
-            logging.warning('Could not remove existing sqlite index: %s', e)
-
-    build_out1_sqlite_index(args.out1, db_path, title_col=args.title_col, taxid_col=args.taxid_col, kmer_col=args.kmer_col)
-
-    # Worker function to process one title and return a row list
-    def worker(title):
-        # fetch out1 record from sqlite index (streaming approach)
-        rec1 = fetch_out1_record_from_db(db_path, title)
-        rec2 = out2_records.get(title, None)
-        out1_field = rec1['kmer_field'] if rec1 else ''
-        out2_field = rec2['kmer_field'] if rec2 else ''
-        out1_counter = rec1['kmer_counter'] if rec1 else Counter()
-        out2_counter = rec2['kmer_counter'] if rec2 else Counter()
-        # determine ref_taxid from out1 kmer results
-        ref_taxid = determine_ref_taxid_from_out1(out1_counter, df1_taxids)
-        ref_species = df1.get(ref_taxid, 'NA') if ref_taxid != 'NA' else 'NA'
-        # composite counts (sum of out1 and out2 for this title)
-        comp = composite_counts(out1_counter, out2_counter)
-        comp_str = sorted_composite_str(comp)
-        judgement = final_judgement(comp, ref_taxid, args.multiplier)
-        return [title, out1_field, out2_field, ref_taxid, ref_species, comp_str, judgement]
+    # stream out1 once, keeping only records for the unannotated titles
+    out1_fields = load_out1_subset(args.out1, set(unannotated_titles), title_col=args.title_col, kmer_col=args.kmer_col)
+
+    def iter_tasks():
+        for title in unannotated_titles:
+            yield title, out1_fields.get(title, ''), out2_fields.get(title, '')
 
     processed = 0
     # If threads == 1, do simple loop (slightly faster/no overhead)
     if args.threads == 1:
         logging.info('Processing %d unannotated titles sequentially...', len(unannotated_titles))
-        with open(outpath, 'a', encoding='utf-8') as outfh:
-            writer = csv.writer(outfh, delimiter='\t', lineterminator='\n')
-            for title in unannotated_titles:
-                row = worker(title)
-                writer.writerow(row)
+        init_worker(df1, args.multiplier)
+        with open(outpath, 'a', encoding='utf-8', buffering=1 << 20) as outfh:
+            write = outfh.write
+            for task in iter_tasks():
+                row = process_title(*task)
+                write('\t'.join(row) + '\n')
                 processed += 1
                 if processed % 1000 == 0:
                     logging.info('Processed %d / %d unannotated sequences', processed, len(unannotated_titles))
     else:
         max_workers = args.threads
-        logging.info('Processing %d unannotated titles using %d threads...', len(unannotated_titles), max_workers)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-            # executor.map preserves input order; iterate results and write sequentially
-            with open(outpath, 'a', encoding='utf-8') as outfh:
-                writer = csv.writer(outfh, delimiter='\t', lineterminator='\n')
-                for i, row in enumerate(ex.map(worker, unannotated_titles), start=1):
-                    writer.writerow(row)
-                    if i % 1000 == 0:
-                        logging.info('Processed %d / %d unannotated sequences', i, len(unannotated_titles))
-                processed = i
-
-    # Close any thread-local sqlite connections
-    conn = getattr(_thread_local, 'conn', None)
-    if conn:
-        try:
-            conn.close()
-        except Exception:
-            pass
+        logging.info('Processing %d unannotated titles using %d processes...', len(unannotated_titles), max_workers)
+        # build chunks lazily and keep at most 2 chunks per worker in flight, so the
+        # parent never holds a pickled copy of every title at once
+        def iter_chunks():
+            chunk = []
+            for task in iter_tasks():
+                chunk.append(task)
+                if len(chunk) >= CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                                    initargs=(df1, args.multiplier)) as ex:
+            pending = deque()
+            chunks = iter_chunks()
+            # futures are drained in submission order so output order matches out2
+            with open(outpath, 'a', encoding='utf-8', buffering=1 << 20) as outfh:
+                write = outfh.write
+                for chunk in chunks:
+                    pending.append(ex.submit(worker_chunk, chunk))
+                    if len(pending) >= 2 * max_workers:
+                        break
+                while pending:
+                    rows = pending.popleft().result()
+                    next_chunk = next(chunks, None)
+                    if next_chunk is not None:
+                        pending.append(ex.submit(worker_chunk, next_chunk))
+                    write(''.join('\t'.join(row) + '\n' for row in rows))
+                    processed += len(rows)
+                    logging.info('Processed %d / %d unannotated sequences', processed, len(unannotated_titles))
 
     logging.info('Finished. Processed %d unannotated sequences. Results written to %s', processed, outpath)
 
@@ -9,13 +9,15 @@ Usage:
     python fasta_id_mapper.py \
         --input-dir <INPUT_DIR> \
         --query-file <QUERY_FILE> \
-        [--segment] [--recursive] [--output <OUT_FILE>] [--format {text,json}]
+        [--segment] [--recursive] [--no-ext-filter] [--cache] [--output <OUT_FILE>] [--format {text,json}]
 
 Options:
     -i, --input-dir      输入目录，包含要扫描的 FASTA 文件
     -q, --query-file     包含查询序列 ID (每行一个) 的文本文件
     -s, --segment        启用分段匹配：将 FASTA ID 按非字母数字分隔，匹配独立部分或前缀
     -r, --recursive      递归扫描子目录
+    --no-ext-filter      不按扩展名筛选，改为读取文件开头判断是否为 FASTA
+    --cache              将每个 FASTA 的 ID 缓存到同目录的 <文件名>.ids.json，文件未变化时直接复用
     -o, --output         输出映射结果到指定文件 (默认 stdout)
     -f, --format         输出格式：text (默认) 或 json
     -h, --help           显示帮助并退出
@@ -23,10 +25,24 @@ Options:
 
 import sys
 import argparse
-import re
 import json
+import mmap
+import os
+import shutil
+import subprocess
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# 系统 grep 路径；不存在时 extract_ids 使用纯 Python 实现
+_GREP = shutil.which('grep')
+
+# 按扩展名识别 FASTA 文件
+FASTA_EXTS = {'.fa', '.fasta', '.fna', '.faa', '.ffn', '.frn'}
+
+# 分段匹配中视为 ID 组成部分的字符，其余字符均为分隔符
+_ALNUM = frozenset('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
 
 
 def parse_args():
@@ -39,6 +55,10 @@ def parse_args():
                         help='使用分段匹配模式')
     parser.add_argument('-r', '--recursive', action='store_true',
                         help='递归扫描子目录')
+    parser.add_argument('--no-ext-filter', action='store_true',
+                        help='不按扩展名筛选 FASTA 文件，改为读取文件内容判断')
+    parser.add_argument('--cache', action='store_true',
+                        help='在 FASTA 旁写入 <文件名>.ids.json 缓存 ID，重复运行时复用')
     parser.add_argument('-o', '--output', type=Path,
                         help='输出文件路径 (默认写到 stdout)')
     parser.add_argument('-f', '--format', choices=('text', 'json'), default='text',
@@ -47,15 +67,20 @@ def parse_args():
 
 
 def load_query_ids(path):
+    # 逐行读取并按首次出现顺序去重，重复的查询 ID 只映射一次
     try:
-        return [line.strip() for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+        with path.open('r', encoding='utf-8') as f:
+            advise_sequential(f)
+            return list(dict.fromkeys(s for s in (line.strip() for line in f) if s))
     except Exception as e:
         sys.exit(f"Error loading query file '{path}': {e}")
 
 
-def find_fasta_files(directory, recursive=False):
+def find_fasta_files(directory, recursive=False, ext_filter=True):
     pattern = '**/*' if recursive else '*'
-    return [p for p in directory.glob(pattern) if p.is_file()]
+    if not ext_filter:
+        return [p for p in directory.glob(pattern) if p.is_file()]
+    return [p for p in directory.glob(pattern) if p.is_file() and p.suffix.lower() in FASTA_EXTS]
 
 
 def is_fasta_file(path, max_lines=10):
@@ -69,31 +94,152 @@ def is_fasta_file(path, max_lines=10):
     return False
 
 
-def extract_ids(path):
+def advise_sequential(fileobj):
+    # 提示操作系统该文件将被顺序读取 (尽力而为，不支持时忽略)
+    try:
+        os.posix_fadvise(fileobj.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return
+    except (AttributeError, OSError):
+        pass
+    # macOS 没有 posix_fadvise，改为开启预读
+    try:
+        import fcntl
+        fcntl.fcntl(fileobj.fileno(), fcntl.F_RDAHEAD, 1)
+    except (ImportError, AttributeError, OSError):
+        pass
+
+
+def advise_mapped(mm):
+    # mmap 读取时对映射区域给出顺序访问提示
+    try:
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    except (AttributeError, OSError):
+        pass
+
+
+def drop_page_cache(fd):
+    # 扫描完成后释放该文件的页缓存，避免挤占其他文件的缓存 (尽力而为)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except (AttributeError, OSError):
+        pass
+
+
+def extract_ids(path, use_cache=False):
+    if not use_cache:
+        return _parse_ids(path)
+    # 结果缓存在 <文件名>.ids.json，以 (mtime, size) 判断源文件是否变化
+    cache = path.with_name(path.name + '.ids.json')
+    st = path.stat()
+    try:
+        data = json.loads(cache.read_text(encoding='utf-8'))
+        if data['mtime_ns'] == st.st_mtime_ns and data['size'] == st.st_size:
+            return set(data['ids'])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    ids = _parse_ids(path)
+    try:
+        cache.write_text(json.dumps({'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                                     'ids': sorted(ids)}, ensure_ascii=False), encoding='utf-8')
+    except OSError:
+        # 目录不可写时仅跳过缓存
+        pass
+    return ids
+
+
+def _parse_ids(path):
+    # 优先调用系统 grep 提取 header 行 (C 实现)，失败时退回 mmap 解析
+    if _GREP:
+        ids = _extract_ids_grep(path)
+        if ids is not None:
+            return ids
+    return _extract_ids_mmap(path)
+
+
+def _extract_ids_grep(path):
+    ids = set()
+    env = dict(os.environ, LC_ALL='C')
+    try:
+        with subprocess.Popen([_GREP, '-a', '-e', '^>', '--', str(path)], stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, bufsize=1 << 20, env=env) as p:
+            for line in p.stdout:
+                fields = line[1:].split(maxsplit=1)
+                if fields:
+                    ids.add(fields[0].decode('utf-8', 'ignore'))
+    except OSError:
+        return None
+    # grep 退出码：0 有匹配，1 无匹配，其他为出错
+    if p.returncode not in (0, 1):
+        return None
+    # grep 自行顺序读取，无法对其文件描述符给出提示；读取完成后仍释放页缓存
+    try:
+        with path.open('rb') as f:
+            drop_page_cache(f.fileno())
+    except OSError:
+        pass
+    return ids
+
+
+def _extract_ids_mmap(path):
+    # 通过 mmap 在 "\n>" 之间跳转，只解析 header 行，跳过序列数据
     ids = set()
-    with path.open('r', encoding='utf-8', errors='ignore') as f:
-        for line in f:
-            if line.startswith('>'):
-                header = line[1:].strip()
-                ids.add(header.split()[0])
+    with path.open('rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ids
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            advise_mapped(mm)
+            if mm[:1] == b'>':
+                i = 0
+            else:
+                i = mm.find(b'\n>')
+                i = i + 1 if i >= 0 else -1
+            while i >= 0:
+                j = mm.find(b'\n', i)
+                if j < 0:
+                    j = len(mm)
+                fields = mm[i + 1:j].split(maxsplit=1)
+                if fields:
+                    ids.add(fields[0].decode('utf-8', 'ignore'))
+                i = mm.find(b'\n>', j)
+                i = i + 1 if i >= 0 else -1
+        drop_page_cache(f.fileno())
     return ids
 
 
-def build_pattern(qid):
-    # 分段或前缀匹配：^qid($|非字母数字)
-    return re.compile(rf'^{re.escape(qid)}($|[^0-9A-Za-z])')
+def _scan_file(path, sniff=False, use_cache=False):
+    # 每个文件独立提取 ID，供进程池并行调用；sniff 时先读取文件开头判断是否为 FASTA
+    if sniff and not is_fasta_file(path):
+        return path, None
+    return path, extract_ids(path, use_cache)
 
 
-def map_ids_to_files(query_ids, fasta_ids_map, segment=False):
-    result = defaultdict(list)
-    patterns = {qid: build_pattern(qid) for qid in query_ids} if segment else {}
-    for qid in query_ids:
-        for fname, ids in fasta_ids_map.items():
+def segment_keys(sid):
+    # 分段匹配的候选键：sid 本身，以及每个非字母数字字符之前的前缀
+    keys = {sid}
+    for i, ch in enumerate(sid):
+        if ch not in _ALNUM:
+            keys.add(sid[:i])
+    return keys
+
+
+def build_id_index(fasta_ids_map, segment=False):
+    # 倒排索引：序列 ID (或分段前缀) -> 出现该 ID 的文件列表
+    index = defaultdict(list)
+    for fname, ids in fasta_ids_map.items():
+        if segment:
+            keys = set()
             for sid in ids:
-                if sid == qid or (segment and patterns[qid].match(sid)):
-                    result[qid].append(str(fname))
-                    break
-    return result
+                keys.update(segment_keys(sid))
+        else:
+            keys = ids
+        for key in keys:
+            index[key].append(str(fname))
+    return index
+
+
+def map_ids_to_files(query_ids, fasta_ids_map, segment=False):
+    index = build_id_index(fasta_ids_map, segment)
+    return {qid: list(index.get(qid, [])) for qid in query_ids}
 
 
 def summarize(mapping):
@@ -134,11 +280,13 @@ def main():
     args = parse_args()
     queries = load_query_ids(args.query_file)
 
-    fasta_files = find_fasta_files(args.input_dir, args.recursive)
+    fasta_files = find_fasta_files(args.input_dir, args.recursive, ext_filter=not args.no_ext_filter)
+    scan = partial(_scan_file, sniff=args.no_ext_filter, use_cache=args.cache)
     fasta_ids_map = {}
-    for path in fasta_files:
-        if is_fasta_file(path):
-            fasta_ids_map[path] = extract_ids(path)
+    with ProcessPoolExecutor() as ex:
+        for path, ids in ex.map(scan, fasta_files, chunksize=4):
+            if ids is not None:
+                fasta_ids_map[path] = ids
 
     mapping = map_ids_to_files(queries, fasta_ids_map, segment=args.segment)
     summary = summarize(mapping)